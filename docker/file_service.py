@@ -1,20 +1,110 @@
 #!/usr/bin/env python3
 
 import os
+import stat
 import uuid
 import mimetypes
+import tempfile
+import functools
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from urllib.parse import quote
+from zlib import adler32
+from flask import Flask, Request, request, jsonify, make_response
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import HTTPException
+from werkzeug.wsgi import wrap_file
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json fallback
+    orjson = None
 
 UPLOAD_DIR = "/tmp/albert-files"
 DEFAULT_PORT = int(os.environ.get("FILE_SERVICE_PORT", "4000"))
+# Directories downloads may be served from (os.pathsep separated override).
+ALLOWED_ROOTS = tuple(
+    os.path.realpath(p)
+    for p in os.environ.get(
+        "FILE_SERVICE_ALLOWED_ROOTS",
+        os.pathsep.join((UPLOAD_DIR, "/tmp/playwright-mcp-output")),
+    ).split(os.pathsep)
+    if p
+)
+
+
+class UploadRequest(Request):
+    """Spool multipart file parts straight into UPLOAD_DIR.
+
+    The spooled file lives on the same filesystem as its final destination,
+    so ``upload_file`` can move it into place with a rename instead of
+    copying the whole body a second time.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        ensure_upload_dir()
+        stream = tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix=".upload-", delete=False)
+        self._spooled_paths = getattr(self, "_spooled_paths", [])
+        self._spooled_paths.append(stream.name)
+        return stream
+
+    def close(self):
+        super().close()
+        # Drop spooled parts that were not moved into place
+        for spooled in getattr(self, "_spooled_paths", ()):
+            try:
+                os.unlink(spooled)
+            except OSError:
+                pass
+
 
 app = Flask(__name__)
+app.request_class = UploadRequest
+# Refuse oversized bodies from the Content-Length header before touching disk
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_UPLOAD_BYTES", 5 * 1024 ** 3))
+# Non-file form fields are small; cap what werkzeug buffers in memory for them
+app.config["MAX_FORM_MEMORY_SIZE"] = 1 << 20
+
+if orjson is not None:
+    class ORJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson (C encoder, no sort pass)."""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            # jsonify() goes through here; hand orjson's bytes straight to the
+            # response instead of decoding them to str and re-encoding.
+            obj = self._prepare_response_obj(args, kwargs)
+            body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+            return self._app.response_class(body, mimetype=self.mimetype)
+
+    app.json = ORJSONProvider(app)
+
+# When a front proxy understands X-Sendfile (or rewrites it to nginx's
+# X-Accel-Redirect), let it ship the bytes via sendfile(2) instead of
+# streaming them through this worker.
+app.use_x_sendfile = os.environ.get("USE_X_SENDFILE") == "1"
+# nginx equivalent: an internal location aliased to UPLOAD_DIR, e.g.
+#   location /internal-files/ { internal; alias /tmp/albert-files/; sendfile on; tcp_nopush on; }
+# Only usable when that nginx can read this container's UPLOAD_DIR.
+ACCEL_REDIRECT_PREFIX = os.environ.get("FILE_SERVICE_ACCEL_PREFIX", "")
+UPLOAD_ROOT = os.path.realpath(UPLOAD_DIR)
+
+
+_upload_dir_ready = False
 
 
 def ensure_upload_dir():
+    global _upload_dir_ready
+    # After the first successful setup a single stat confirms the directory
+    if _upload_dir_ready and os.path.isdir(UPLOAD_DIR):
+        return
     try:
         os.makedirs(UPLOAD_DIR, exist_ok=True)
+        _upload_dir_ready = True
         # Make it world-writable as container may run different users
         os.chmod(UPLOAD_DIR, 0o777)
     except Exception:
@@ -22,6 +112,93 @@ def ensure_upload_dir():
         pass
 
 
+# Load the system mime tables now rather than on the first download
+mimetypes.init()
+
+
+@functools.lru_cache(maxsize=1024)
+def _guess_mime(suffixes):
+    return mimetypes.guess_type("file" + suffixes)[0]
+
+
+def guess_mime(path):
+    """Guess a content-type, cached per extension (upload names are unique)."""
+    return _guess_mime("".join(Path(path).suffixes[-2:]))
+
+
+def _allowed_root(real_path):
+    """Return the allowed root containing ``real_path`` or None."""
+    for root in ALLOWED_ROOTS:
+        if os.path.commonpath((root, real_path)) == root:
+            return root
+    return None
+
+
+def _drop_page_cache(path):
+    """Ask the kernel to evict a freshly written file from the page cache."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        # Starts writeback of dirty pages and drops the clean ones without
+        # blocking the request on a full fsync
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _send_regular_file(real, mime):
+    """Serve ``real`` using one open() and fstat(), or return None if it is
+    not a regular file.
+
+    send_file/send_from_directory would isfile() and stat() the path again
+    after the caller's own check; this builds the same conditional, range
+    capable response from the already opened descriptor instead.
+    """
+    try:
+        fd = os.open(real, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+    try:
+        st = os.fstat(fd)
+    except OSError:
+        os.close(fd)
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        os.close(fd)
+        return None
+    if app.use_x_sendfile:
+        os.close(fd)
+        resp = app.response_class(None, mimetype=mime, headers={"X-Sendfile": real})
+    else:
+        fh = os.fdopen(fd, "rb")
+        resp = app.response_class(wrap_file(request.environ, fh), mimetype=mime, direct_passthrough=True)
+    name = os.path.basename(real)
+    try:
+        name.encode("ascii")
+        resp.headers.set("Content-Disposition", "inline", filename=name)
+    except UnicodeEncodeError:
+        resp.headers.set("Content-Disposition", "inline", **{"filename*": "UTF-8''" + quote(name)})
+    resp.content_length = st.st_size
+    resp.last_modified = st.st_mtime
+    resp.cache_control.no_cache = True
+    resp.set_etag(f"{st.st_mtime}-{st.st_size}-{adler32(real.encode()) & 0xFFFFFFFF}")
+    resp = resp.make_conditional(request.environ, accept_ranges=True, complete_length=st.st_size)
+    if resp.status_code == 304:
+        resp.headers.pop("X-Sendfile", None)
+    return resp
+
+
+@app.errorhandler(413)
+def too_large(e):
+    return jsonify({"error": "Upload exceeds the maximum allowed size", "maxBytes": app.config["MAX_CONTENT_LENGTH"]}), 413
+
+
 @app.get("/health")
 def health():
     return jsonify({"status": "ok"})
@@ -29,8 +206,6 @@ def health():
 
 @app.post("/upload")
 def upload_file():
-    ensure_upload_dir()
-
     if "file" not in request.files:
         return jsonify({"error": "No file part 'file' in form-data"}), 400
 
@@ -43,7 +218,13 @@ def upload_file():
     dest_path = os.path.join(UPLOAD_DIR, new_name)
 
     try:
-        file.save(dest_path)
+        spooled = getattr(file.stream, "name", None)
+        if isinstance(spooled, str) and os.path.dirname(spooled) == UPLOAD_DIR:
+            file.stream.flush()
+            os.replace(spooled, dest_path)
+        else:
+            file.save(dest_path)
+        _drop_page_cache(dest_path)
         # relax permissions; directory already 777
         try:
             os.chmod(dest_path, 0o666)
@@ -64,19 +245,35 @@ def download_file():
     if not os.path.isabs(path):
         return jsonify({"error": "Provided path must be an absolute path"}), 400
 
-    if not os.path.exists(path) or not os.path.isfile(path):
-        return jsonify({"error": "File not found"}), 404
+    real = os.path.realpath(path)
+    root = _allowed_root(real)
+    if root is None:
+        return jsonify({"error": "Path is outside the allowed download directories"}), 403
 
     # Try to guess a content-type
-    mime, _ = mimetypes.guess_type(path)
+    mime = guess_mime(real)
+    if ACCEL_REDIRECT_PREFIX and root == UPLOAD_ROOT:
+        # Hand the transfer to nginx; this worker is released immediately
+        # (nginx answers 404 itself if the file does not exist)
+        resp = make_response("", 200)
+        resp.headers["X-Accel-Redirect"] = ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(os.path.relpath(real, root))
+        resp.headers["Content-Type"] = mime or "application/octet-stream"
+        return resp
     try:
-        return send_file(path, mimetype=mime or "application/octet-stream", as_attachment=False, conditional=True)
+        resp = _send_regular_file(real, mime or "application/octet-stream")
+    except HTTPException:
+        raise  # e.g. 416 for an unsatisfiable Range
     except Exception as e:
         return jsonify({"error": f"Failed to read file: {e}"}), 500
+    if resp is None:
+        return jsonify({"error": "File not found"}), 404
+    return resp
+
+
+ensure_upload_dir()
 
 
 def main():
-    ensure_upload_dir()
     port = int(os.environ.get("FILE_SERVICE_PORT", DEFAULT_PORT))
     # Bind to all interfaces
     app.run(host="0.0.0.0", port=port)
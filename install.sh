@@ -267,34 +267,31 @@ After=network-online.target nginx.service albert-container-manager.service
 Wants=nginx.service
 
 [Service]
-Type=oneshot
+Type=simple
+Restart=always
+RestartSec=5
 WorkingDirectory=/opt/albert-ai-sandbox-manager
 Environment=ALBERT_INACTIVITY_STATE=/opt/albert-ai-sandbox-manager/data/container-activity.json
 Environment=ALBERT_MANAGER_SCRIPT=/opt/albert-ai-sandbox-manager/scripts/albert-ai-sandbox-manager.sh
 Environment=ALBERT_NGINX_ACCESS_LOG=/var/log/nginx/access.log
 Environment=ALBERT_INACTIVITY_SECONDS=600
 Environment=ALBERT_MAX_AGE_SECONDS=86400
-ExecStart=/usr/bin/env bash -c '[ -x /opt/albert-ai-sandbox-manager/venv/bin/python ] && exec /opt/albert-ai-sandbox-manager/venv/bin/python /opt/albert-ai-sandbox-manager/scripts/inactivity_watcher.py || exec python3 /opt/albert-ai-sandbox-manager/scripts/inactivity_watcher.py'
+Environment=ALBERT_WATCHER_INTERVAL=60
+ExecStart=/usr/bin/env bash -c '[ -x /opt/albert-ai-sandbox-manager/venv/bin/python ] && exec /opt/albert-ai-sandbox-manager/venv/bin/python /opt/albert-ai-sandbox-manager/scripts/inactivity_watcher.py --daemon || exec python3 /opt/albert-ai-sandbox-manager/scripts/inactivity_watcher.py --daemon'
 
 [Install]
 WantedBy=multi-user.target
 EOF
 
-cat > "$INACTIVITY_TIMER_FILE" <<'EOF'
-[Unit]
-Description=Run ALBERT inactivity watcher periodically
-
-[Timer]
-OnBootSec=2min
-OnUnitActiveSec=1min
-AccuracySec=30s
-
-[Install]
-WantedBy=timers.target
-EOF
+# The watcher now runs as a daemon; retire the per-minute timer of older installs
+if [ -f "$INACTIVITY_TIMER_FILE" ]; then
+    systemctl disable --now albert-inactivity-watcher.timer 2>/dev/null || true
+    rm -f "$INACTIVITY_TIMER_FILE"
+fi
 
 systemctl daemon-reload
-systemctl enable --now albert-inactivity-watcher.timer
+systemctl enable albert-inactivity-watcher.service
+systemctl restart albert-inactivity-watcher.service || echo -e "${YELLOW}Warning: Inactivity watcher failed to (re)start; check logs with: journalctl -u albert-inactivity-watcher -e${NC}"
 
 # ---------------------------------------------------------------------------
 # Nginx routing for manager service under /manager/
@@ -323,6 +320,41 @@ else
 	echo -e "${YELLOW}Nginx manager route already exists, skipping${NC}"
 fi
 
+# ---------------------------------------------------------------------------
+# Buffered access log for the default site (read by the inactivity watcher)
+# ---------------------------------------------------------------------------
+# nginx otherwise issues one write() per request; batching lines into 64k
+# chunks (flushed at least every 5s) makes the log appends the watcher tails
+# few and large. 5s is far below the idle threshold, so detection is unaffected.
+# The file sits outside the albert-<name>.conf namespace that nginx-manager.sh
+# writes sandbox configs into (and the albert-*.conf include loads), so a
+# sandbox name cannot overwrite it; the default site includes it explicitly.
+ACCESS_LOG_NGX_CONF="${NGINX_CONF_DIR}/00-albert-access-log.conf"
+# Earlier installs wrote it inside that namespace
+rm -f "${NGINX_CONF_DIR}/albert-access-log.conf"
+if [ ! -f "$ACCESS_LOG_NGX_CONF" ]; then
+cat > "$ACCESS_LOG_NGX_CONF" <<'EOF'
+# Buffered access log for ALBERT sandbox traffic (tailed by inactivity_watcher.py)
+access_log /var/log/nginx/access.log combined buffer=64k flush=5s;
+EOF
+	echo -e "${GREEN}✓ Buffered nginx access log configured${NC}"
+else
+	echo -e "${YELLOW}Nginx access log config already exists, skipping${NC}"
+fi
+if [ -f "${DEFAULT_SITE}" ] && ! grep -qF "include ${ACCESS_LOG_NGX_CONF};" "${DEFAULT_SITE}"; then
+	awk -v inc_line="include ${ACCESS_LOG_NGX_CONF};" '
+		BEGIN { inserted=0 }
+		{
+			print $0
+			if (!inserted && $0 ~ /server_name[[:space:]]+_;/) {
+				print "\t" inc_line
+				inserted=1
+			}
+		}
+	' "${DEFAULT_SITE}" > "${DEFAULT_SITE}.tmp" && mv "${DEFAULT_SITE}.tmp" "${DEFAULT_SITE}"
+	echo -e "${GREEN}✓ Access log config included in nginx default site${NC}"
+fi
+
 # Ensure include line exists (reuse logic already applied earlier)
 if systemctl is-active --quiet nginx; then
 	nginx -t && systemctl reload nginx || systemctl restart nginx || true
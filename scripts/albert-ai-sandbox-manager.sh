@@ -1236,6 +1236,17 @@ PY
                 fi
                 exit 0
                 ;;
+	purge-missing)
+		# Admin: drop registry entry, nginx config and DB row of a sandbox whose
+		# container is gone (used by the inactivity watcher; no API key needed,
+		# as the owning key may already be revoked)
+		name="${2:-}"
+		if [ -z "$name" ]; then echo "ERROR: purge-missing requires a container name" >&2; exit 1; fi
+		if ! docker info >/dev/null 2>&1; then echo "ERROR: Docker not reachable" >&2; exit 1; fi
+		if container_exists "$name"; then echo "ERROR: Container $name still exists" >&2; exit 1; fi
+		purge_missing_sandbox_metadata "$name"
+		exit $?
+		;;
 	dbtrace)
 		# Deeper DB diagnostics
 		echo "=== dbtrace ==="
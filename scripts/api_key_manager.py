@@ -17,10 +17,12 @@ import os
 import sys
 import argparse
 import sqlite3
-import hashlib
+from hashlib import sha256
 import time
 import secrets
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 THIS_FILE = Path(__file__).resolve()
@@ -46,11 +48,16 @@ CREATE TABLE IF NOT EXISTS containers (
   created_at INTEGER NOT NULL,
   FOREIGN KEY(api_key_id) REFERENCES api_keys(id) ON DELETE CASCADE
 );
+-- Covers the auth lookup (key_hash -> id, label) without touching the table
+CREATE INDEX IF NOT EXISTS idx_api_keys_hash_cover ON api_keys(key_hash, id, label);
+-- Per-key container lookups (listing, revoke) and the delete by (owner, name)
+CREATE INDEX IF NOT EXISTS idx_containers_owner_name ON containers(api_key_id, name);
 """
 
-def hash_key(k: str) -> str:
-    import hashlib
-    return hashlib.sha256(k.encode('utf-8')).hexdigest()
+SQL_INSERT_KEY = "INSERT INTO api_keys(key_hash, label, created_at) VALUES(?,?,?)"
+
+def hash_key(k) -> str:
+    return sha256(k if isinstance(k, bytes) else k.encode('utf-8')).hexdigest()
 
 def get_db():
     Path(os.path.dirname(DB_PATH)).mkdir(parents=True, exist_ok=True)
@@ -82,12 +89,10 @@ def cmd_create(args):
     # Generate secure random key
     raw_key = secrets.token_urlsafe(32)
     key_hash = hash_key(raw_key)
+    created_at = time.time_ns() // 10**9
     conn = get_db()
     try:
-        conn.execute(
-            "INSERT INTO api_keys(key_hash, label, created_at) VALUES(?,?,?)",
-            (key_hash, label, int(time.time()))
-        )
+        conn.execute(SQL_INSERT_KEY, (key_hash, label, created_at))
         conn.commit()
     except sqlite3.IntegrityError:
         print("Failed to insert key (hash collision?)", file=sys.stderr)
@@ -115,9 +120,21 @@ def cmd_list(_args):
         print(f"id={r['id']} label={r['label'] or ''} created={time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r['created_at']))} key_hash_prefix={r['key_hash'][:12]}")
 
 
+_DCLIENT = None
+# Parallel stop/remove calls on revoke; the client's pool must hold as many
+# connections, or workers block waiting for one (docker-py defaults to 10).
+REVOKE_WORKERS = 16
+
 def _docker_client():
-    import docker
-    return docker.from_env()
+    """Return a shared Docker client, created on first use.
+
+    The docker import stays lazy so create/list work on hosts without the SDK.
+    """
+    global _DCLIENT
+    if _DCLIENT is None:
+        import docker
+        _DCLIENT = docker.from_env(max_pool_size=REVOKE_WORKERS)
+    return _DCLIENT
 
 
 def cmd_revoke(args):
@@ -142,11 +159,13 @@ def cmd_revoke(args):
     finally:
         conn.close()
 
-    # Remove containers via Docker
+    # Remove containers via Docker (stops overlap; each waits out its own grace period)
     if containers:
         print(f"Stopping/removing {len(containers)} containers...")
         dclient = _docker_client()
-        for c in containers:
+        print_lock = threading.Lock()
+
+        def _stop_and_remove(c):
             cid = c['container_id']
             try:
                 cont = dclient.containers.get(cid)
@@ -156,11 +175,16 @@ def cmd_revoke(args):
                     pass
                 try:
                     cont.remove(v=True, force=True)
-                    print(f" removed {cid[:12]}")
+                    msg = f" removed {cid[:12]}"
                 except Exception as e:
-                    print(f" failed removing {cid[:12]}: {e}")
+                    msg = f" failed removing {cid[:12]}: {e}"
             except Exception:
-                print(f" container {cid[:12]} missing; skipping")
+                msg = f" container {cid[:12]} missing; skipping"
+            with print_lock:
+                print(msg)
+
+        with ThreadPoolExecutor(max_workers=min(REVOKE_WORKERS, len(containers))) as pool:
+            list(pool.map(_stop_and_remove, containers))
 
     # Delete DB entries (api_key cascade removes containers row)
     conn = get_db()
@@ -9,12 +9,13 @@ Auth: Bearer token with API key. Keys stored hashed (SHA256) in SQLite.
 Endpoints (all require Authorization unless stated):
   GET  /health
   POST /containers
-  GET  /containers
+  GET  /containers            (?ids=a,b,c limits the list to those names)
   GET  /containers/<id>
   POST /containers/<id>/start
   POST /containers/<id>/stop
   POST /containers/<id>/restart
   DELETE /containers/<id>
+  POST /containers:batch      {"op": "start|stop|restart|delete", "ids": [...]}
 
 Request JSON for create (POST /containers):
   {
@@ -27,9 +28,14 @@ Request JSON for create (POST /containers):
 
 Environment Variables:
   MANAGER_PORT          (default 5001)
+  MANAGER_THREADS       (request threads when served by gunicorn, default 8)
   MANAGER_DB_PATH       (default ./data/manager.db)
   MANAGER_DATA_DIR      (default ./data/containers)
   MANAGER_ALLOWED_IMAGES (optional comma separated allow-list)
+  DOCKER_HOST           (default unix:///var/run/docker.sock)
+  MANAGER_AUTH_CACHE_TTL (seconds a validated key stays cached, default 60; 0 disables)
+                         SIGWINCH reloads the key table immediately.
+  ALBERT_REGISTRY_FILE  (sandbox registry JSON maintained by the manager script)
 
 Data layout:
   data/manager.db (SQLite)
@@ -38,15 +44,34 @@ Data layout:
 """
 import os
 import sqlite3
-import hashlib
+import hmac
 import time
 import json
+import re
+import signal
 import subprocess
 import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from hashlib import sha256
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json fallback
+    orjson = None
+
+try:
+    import docker
+    from docker.errors import NotFound as DockerNotFound
+except ImportError:  # pragma: no cover - fall back to the docker CLI
+    docker = None
+    DockerNotFound = None
 
 THIS_FILE = Path(__file__).resolve()
 BASE_DIR = THIS_FILE.parent.parent
@@ -55,9 +80,11 @@ DEFAULT_DATA_DIR = BASE_DIR / "data" / "containers"
 
 # Configuration
 PORT = int(os.environ.get("MANAGER_PORT", "5001"))
+THREADS = int(os.environ.get("MANAGER_THREADS", "8"))
 DB_PATH = os.environ.get("MANAGER_DB_PATH", str(DEFAULT_DB_PATH))
 DATA_DIR = os.environ.get("MANAGER_DATA_DIR", str(DEFAULT_DATA_DIR))
 ALLOWED_IMAGES = [i.strip() for i in os.environ.get("MANAGER_ALLOWED_IMAGES", "").split(",") if i.strip()] or None
+DOCKER_BASE_URL = os.environ.get("DOCKER_HOST", "unix:///var/run/docker.sock")
 
 Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
 Path(os.path.dirname(DB_PATH)).mkdir(parents=True, exist_ok=True)
@@ -71,16 +98,90 @@ if not Path(DB_PATH).exists() and legacy_db.exists():
 
 app = Flask(__name__)
 
+if orjson is not None:
+    class ORJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson (C encoder, no sort pass)."""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            # jsonify() goes through here; hand orjson's bytes straight to the
+            # response instead of decoding them to str and re-encoding.
+            obj = self._prepare_response_obj(args, kwargs)
+            body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+            return self._app.response_class(body, mimetype=self.mimetype)
+
+    app.json = ORJSONProvider(app)
+
+# Key order carries no meaning in these responses; skip the sort pass in the
+# stdlib fallback provider (orjson never sorts).
+app.json.sort_keys = False
+
+@app.after_request
+def _no_store(response):
+    # Every response is tied to an API key; keep shared caches from storing it.
+    # Conditional reads set their own (revalidating) policy.
+    response.headers.setdefault("Cache-Control", "no-store")
+    return response
+
 # Serialize mutating operations (create, remove, start, stop, restart) to prevent
 # concurrent subprocess calls from corrupting shared files (registry JSON, nginx configs).
 _mutate_lock = threading.Lock()
 
+# The Docker API client talks HTTP over the daemon socket directly, avoiding
+# a fork/exec of the docker CLI per call. A single client is shared by all
+# threads; its connection pool holds one socket per request thread (THREADS)
+# plus one per inspect worker (INSPECT_WORKERS), so no caller waits for one.
+INSPECT_WORKERS = 8
+_docker_client = None
+_docker_client_lock = threading.Lock()
+
+
+def docker_api():
+    """Return the shared Docker API client, or None if the SDK is unusable.
+
+    One client serves every thread: its urllib3 pool is thread-safe and is
+    sized for the request threads plus the inspect fan-out, so concurrent
+    calls reuse keep-alive socket connections instead of opening new ones
+    (and the API version is negotiated once).
+    """
+    global _docker_client
+    if docker is None:
+        return None
+    client = _docker_client
+    if client is None:
+        with _docker_client_lock:
+            client = _docker_client
+            if client is None:
+                try:
+                    client = docker.APIClient(
+                        base_url=DOCKER_BASE_URL,
+                        version="auto",
+                        timeout=30,
+                        max_pool_size=THREADS + INSPECT_WORKERS,
+                    )
+                except Exception:
+                    return None
+                _docker_client = client
+    return client
+
 
 def docker_info_available() -> bool:
     """Best-effort check whether the Docker daemon is reachable."""
+    client = docker_api()
+    if client is not None:
+        try:
+            # GET /_ping is answered without enumerating images/containers
+            return client.ping() is True
+        except Exception:
+            pass
     try:
         subprocess.run(
-            ["docker", "info"],
+            ["docker", "version", "--format", "{{.Server.Version}}"],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             check=True,
@@ -91,8 +192,48 @@ def docker_info_available() -> bool:
         return False
 
 
+# Short-lived cache of inspect payloads: a single request often inspects the
+# same container more than once (registry mapping, serialization, status).
+INSPECT_CACHE_TTL = 1.0
+INSPECT_CACHE_MAX = 1024
+_inspect_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_inspect_cache_lock = threading.Lock()
+
+
+def invalidate_inspect_cache(name: str) -> None:
+    """Forget the cached inspect payload after a lifecycle change."""
+    with _inspect_cache_lock:
+        _inspect_cache.pop(name, None)
+
+
 def inspect_container(name: str) -> Optional[Dict[str, Any]]:
-    """Return the raw docker inspect payload for a container name."""
+    """Return the raw docker inspect payload for a container name (cached briefly)."""
+    now = time.monotonic()
+    with _inspect_cache_lock:
+        cached = _inspect_cache.get(name)
+    if cached and cached[0] > now:
+        return cached[1]
+    info = _inspect_container_uncached(name)
+    if info:
+        with _inspect_cache_lock:
+            if len(_inspect_cache) >= INSPECT_CACHE_MAX:
+                for key in [k for k, (exp, _) in _inspect_cache.items() if exp <= now]:
+                    del _inspect_cache[key]
+                if len(_inspect_cache) >= INSPECT_CACHE_MAX:
+                    del _inspect_cache[next(iter(_inspect_cache))]
+            _inspect_cache[name] = (now + INSPECT_CACHE_TTL, info)
+    return info
+
+
+def _inspect_container_uncached(name: str) -> Optional[Dict[str, Any]]:
+    client = docker_api()
+    if client is not None:
+        try:
+            return client.inspect_container(name)
+        except DockerNotFound:
+            return None
+        except Exception:
+            pass  # daemon API unusable; retry through the CLI
     try:
         proc = subprocess.run(
             ["docker", "inspect", name],
@@ -112,6 +253,48 @@ def inspect_container(name: str) -> Optional[Dict[str, Any]]:
     return payload[0]
 
 
+# Threads for fanning out per-container inspect requests over the shared
+# client's connection pool (see docker_api).
+_inspect_pool = ThreadPoolExecutor(max_workers=INSPECT_WORKERS, thread_name_prefix="inspect")
+
+
+def inspect_containers(names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Inspect several containers, keyed by name.
+
+    Uses the Docker API when available (one socket request per name, issued
+    concurrently), otherwise a single docker CLI call for all names.
+    """
+    result: Dict[str, Dict[str, Any]] = {}
+    if not names:
+        return result
+    if docker_api() is not None:
+        infos = _inspect_pool.map(inspect_container, names) if len(names) > 1 else [inspect_container(names[0])]
+        for name, info in zip(names, infos):
+            if info:
+                result[name] = info
+        return result
+    try:
+        # docker inspect exits non-zero if any name is missing but still
+        # prints the payload for the ones it found.
+        proc = subprocess.run(
+            ["docker", "inspect", *names],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return {}
+    try:
+        payload = json.loads(proc.stdout or "[]")
+    except json.JSONDecodeError:
+        return {}
+    for info in payload or []:
+        resolved = (info.get("Name") or "").lstrip("/")
+        if resolved:
+            result[resolved] = info
+    return result
+
+
 def _normalize_finished_at(value: Optional[str]) -> Optional[str]:
     if not value:
         return None
@@ -121,9 +304,8 @@ def _normalize_finished_at(value: Optional[str]) -> Optional[str]:
     return value
 
 
-def serialize_container(name: str) -> Dict[str, Any]:
-    """Return a normalized container description using docker CLI inspect."""
-    info = inspect_container(name)
+def serialize_from_info(info: Optional[Dict[str, Any]], name: str) -> Dict[str, Any]:
+    """Return a normalized container description from a docker inspect payload."""
     if not info:
         return {
             "name": name,
@@ -142,6 +324,11 @@ def serialize_container(name: str) -> Dict[str, Any]:
     }
 
 
+def serialize_container(name: str) -> Dict[str, Any]:
+    """Return a normalized container description using docker CLI inspect."""
+    return serialize_from_info(inspect_container(name), name)
+
+
 def _extract_script_metadata(payload: Any) -> Dict[str, Any]:
     if not isinstance(payload, dict):
         return {}
@@ -164,10 +351,74 @@ def _extract_script_metadata(payload: Any) -> Dict[str, Any]:
 
 # --- Database helpers ------------------------------------------------------
 
+_db_local = threading.local()
+
+class _ThreadDb:
+    """Owns one thread's connection; it is closed when the thread's locals
+    are released on thread exit (or at interpreter exit, via finalize)."""
+    __slots__ = ("conn", "closer", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.closer = weakref.finalize(self, conn.close)
+
+# Live per-thread handles, for the fork hook
+_db_handles: "weakref.WeakSet[_ThreadDb]" = weakref.WeakSet()
+# Handles inherited from the parent, pinned in a forked child (see below)
+_inherited_db_handles: List[_ThreadDb] = []
+# WAL allows concurrent readers but only one writer; serialize writes here
+# instead of letting threads spin on SQLITE_BUSY.
+_db_write_lock = threading.Lock()
+
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Return this thread's long-lived SQLite connection (WAL, autocommit)."""
+    handle = getattr(_db_local, "db", None)
+    if handle is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA cache_size=-64000;"
+            "PRAGMA temp_store=MEMORY;"
+        )
+        handle = _db_local.db = _ThreadDb(conn)
+        _db_handles.add(handle)
+    return handle.conn
+
+def _forget_db_after_fork() -> None:
+    # A forked worker must not reuse (or close) the parent's connections:
+    # SQLite handles are not fork-safe. Detach their finalizers and keep the
+    # handles referenced for the child's lifetime, so neither finalize nor
+    # Connection dealloc closes them here; the child opens its own.
+    global _db_local
+    for handle in list(_db_handles):
+        handle.closer.detach()
+        _inherited_db_handles.append(handle)
+    _db_local = threading.local()
+
+os.register_at_fork(after_in_child=_forget_db_after_fork)
+
+@contextmanager
+def db_write():
+    """Run a group of writes as one IMMEDIATE transaction on this thread's connection.
+
+    The sandbox script and api_key_manager.py write the same database, so
+    the reserved lock is taken up front rather than upgraded mid-way, and
+    the whole group costs a single WAL commit.
+    """
+    conn = get_db()
+    with _db_write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            # Also covers a failed COMMIT (e.g. SQLITE_BUSY), which leaves the
+            # transaction open on this long-lived connection.
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS api_keys (
@@ -185,22 +436,46 @@ CREATE TABLE IF NOT EXISTS containers (
   created_at INTEGER NOT NULL,
   FOREIGN KEY(api_key_id) REFERENCES api_keys(id) ON DELETE CASCADE
 );
+-- Covers the auth lookup (key_hash -> id, label) without touching the table
+CREATE INDEX IF NOT EXISTS idx_api_keys_hash_cover ON api_keys(key_hash, id, label);
+-- Per-key container lookups (listing, revoke) and the delete by (owner, name)
+CREATE INDEX IF NOT EXISTS idx_containers_owner_name ON containers(api_key_id, name);
 """
 
+# Hot-path statements. sqlite3 keeps a per-connection cache of compiled
+# statements keyed by SQL text, so always issuing these exact strings on the
+# persistent connection skips re-preparing them on every request.
+# No INDEXED BY hint: it turns a missing index into a prepare error (a 500 on
+# every request). The planner may pick the UNIQUE autoindex over the covering
+# one, which costs one table row read on an auth-cache miss.
+SQL_AUTH_LOOKUP = "SELECT id, key_hash, label FROM api_keys WHERE key_hash=?"
+SQL_ALL_KEYS = "SELECT id, key_hash, label FROM api_keys"
+# OR IGNORE: the UNIQUE(container_id) constraint makes a repeat mapping a no-op
+SQL_CONTAINER_INSERT = "INSERT OR IGNORE INTO containers(api_key_id, container_id, name, image, created_at) VALUES(?,?,?,?,?)"
+SQL_CONTAINER_DELETE = "DELETE FROM containers WHERE api_key_id=? AND name=?"
+
 def init_db():
-    conn = get_db()
-    try:
-        conn.executescript(SCHEMA)
-        conn.commit()
-    finally:
-        conn.close()
+    get_db().executescript(SCHEMA)
 
 init_db()
 
 # --- Auth ------------------------------------------------------------------
 
-def hash_key(raw: str) -> str:
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+def hash_key(raw) -> str:
+    """SHA-256 hex digest of an API key given as str or bytes."""
+    return sha256(raw if isinstance(raw, bytes) else raw.encode("utf-8")).hexdigest()
+
+def _warn_if_builtin_sha256() -> None:
+    """Log when hashlib fell back to its scalar SHA-256 instead of OpenSSL.
+
+    OpenSSL's implementation uses the SHA-NI/ARMv8 instructions where the CPU
+    has them; the builtin fallback does not, which makes every auth slower.
+    """
+    backend = type(sha256()).__module__
+    if backend != "_hashlib":
+        app.logger.warning("hashlib sha256 backend is %s, not OpenSSL; API key hashing is not hardware accelerated", backend)
+
+_warn_if_builtin_sha256()
 
 def extract_bearer() -> Optional[str]:
     auth = request.headers.get("Authorization")
@@ -208,19 +483,88 @@ def extract_bearer() -> Optional[str]:
         return None
     return auth.split(None, 1)[1].strip()
 
+# Validated keys -> auth info. The raw key is a secret: this map is process
+# local and never logged. Entries expire so a revoked key (removed by
+# api_key_manager.py in another process) stops working within the TTL.
+# Unknown keys are not cached, so newly created keys work immediately.
+AUTH_CACHE_TTL = float(os.environ.get("MANAGER_AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_MAX = 1024
+_auth_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_auth_cache_lock = threading.Lock()
+# Snapshot of the api_keys table (key_hash -> auth info), refreshed every
+# AUTH_CACHE_TTL seconds or on RELOAD_SIGNAL, so authenticating a known key is a
+# dict lookup. A hash missing from it is still checked in SQLite, so keys
+# created since the last refresh work immediately.
+_key_table: Dict[str, Dict[str, Any]] = {}
+_key_table_expires = 0.0
+
+def reload_api_keys() -> None:
+    """Reload the key table from SQLite and drop the per-key cache."""
+    global _key_table, _key_table_expires
+    table = {row["key_hash"]: dict(row) for row in get_db().execute(SQL_ALL_KEYS)}
+    with _auth_cache_lock:
+        _key_table = table
+        _key_table_expires = time.monotonic() + AUTH_CACHE_TTL
+        _auth_cache.clear()
+
+def expire_api_keys(*_args) -> None:
+    """Force a key table reload on the next request (RELOAD_SIGNAL handler, after fork)."""
+    global _key_table_expires
+    _key_table_expires = 0.0
+
+os.register_at_fork(after_in_child=expire_api_keys)
+
+# Handled inside the serving process, so a reload neither restarts the
+# gunicorn worker (as HUP to the master would, killing running script
+# mutations) nor disturbs anything else: the gunicorn master ignores WINCH
+# when not daemonized, and its default action elsewhere is to ignore it.
+RELOAD_SIGNAL = signal.SIGWINCH
+
+def _install_reload_handler(worker=None) -> None:
+    """Route RELOAD_SIGNAL to expire_api_keys (also gunicorn's post_worker_init hook)."""
+    signal.signal(RELOAD_SIGNAL, expire_api_keys)
+    signal.siginterrupt(RELOAD_SIGNAL, False)
+
+def _lookup_api_key(key: str) -> Optional[Dict[str, Any]]:
+    now = time.monotonic()
+    if AUTH_CACHE_TTL > 0 and now >= _key_table_expires:
+        reload_api_keys()
+    with _auth_cache_lock:
+        cached = _auth_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    key_h = hash_key(key)
+    info = _key_table.get(key_h)
+    if info is None:
+        row = get_db().execute(SQL_AUTH_LOOKUP, (key_h,)).fetchone()
+        if not row or not hmac.compare_digest(row["key_hash"], key_h):
+            if cached:
+                with _auth_cache_lock:
+                    _auth_cache.pop(key, None)
+            return None
+        info = dict(row)
+        if AUTH_CACHE_TTL > 0:
+            with _auth_cache_lock:
+                _key_table[key_h] = info
+    if AUTH_CACHE_TTL > 0:
+        with _auth_cache_lock:
+            if len(_auth_cache) >= AUTH_CACHE_MAX:
+                for k in [k for k, (exp, _) in _auth_cache.items() if exp <= now]:
+                    del _auth_cache[k]
+                if len(_auth_cache) >= AUTH_CACHE_MAX:
+                    del _auth_cache[next(iter(_auth_cache))]
+            _auth_cache[key] = (now + AUTH_CACHE_TTL, info)
+    return info
+
 def require_api_key():
     key = extract_bearer()
     if not key:
         return None, (jsonify({"error": "Missing or invalid Authorization header"}), 401)
-    key_h = hash_key(key)
-    conn = get_db()
-    try:
-        row = conn.execute("SELECT id, key_hash, label FROM api_keys WHERE key_hash=?", (key_h,)).fetchone()
-        if not row:
-            return None, (jsonify({"error": "Invalid API key"}), 401)
-        return dict(row), None
-    finally:
-        conn.close()
+    auth_info = _lookup_api_key(key)
+    if auth_info is None:
+        return None, (jsonify({"error": "Invalid API key"}), 401)
+    # Copy so handlers can't mutate the cached entry
+    return dict(auth_info), None
 
 # --- Utility ---------------------------------------------------------------
 
@@ -229,10 +573,14 @@ def allowed_image(image: str) -> bool:
         return True
     return image in ALLOWED_IMAGES
 
+_data_dirs_created = set()
+
 def container_data_dir(api_key_hash: str, name_or_id: str) -> str:
     prefix = api_key_hash[:12]
     path = os.path.join(DATA_DIR, prefix, name_or_id)
-    os.makedirs(path, exist_ok=True)
+    if path not in _data_dirs_created:
+        os.makedirs(path, exist_ok=True)
+        _data_dirs_created.add(path)
     return path
 
 LABEL_MANAGER = "albert.manager"
@@ -250,6 +598,10 @@ def _script_env(api_key_hash: str) -> dict:
     env["ALBERT_STATUS_SKIP_STATS"] = "1"  # speed up status endpoints for REST use
     return env
 
+# First '{' or '[' that is not part of an ANSI colour escape (ESC '[')
+_JSON_START = re.compile(r"(?<!\x1b)[{\[]")
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 def _run_script(args: List[str], api_key_hash: str, expect_json: bool = True) -> Tuple[int, str, Optional[Any]]:
     """Run the external sandbox manager script.
 
@@ -261,40 +613,165 @@ def _run_script(args: List[str], api_key_hash: str, expect_json: bool = True) ->
         proc = subprocess.run([SANDBOX_SCRIPT] + args, capture_output=True, text=True, env=_script_env(api_key_hash), timeout=300)
     except subprocess.TimeoutExpired:
         return 124, "Script timeout", None
-    out = proc.stdout.strip()
+    stdout = proc.stdout
+    out = stdout.strip()
     if expect_json:
         # Try to locate JSON (strip color codes if any leaked)
         try:
-            # Find first '{' or '[' substring
-            start = min([p for p in [out.find('{'), out.find('[')] if p >= 0]) if ('{' in out or '[' in out) else 0
-            jtxt = out[start:]
-            data = json.loads(jtxt)
+            # Locate the JSON payload in a single scan of the raw output;
+            # the parser skips surrounding whitespace itself.
+            match = _JSON_START.search(stdout)
+            data = _json_loads(stdout[match.start():] if match else stdout)
             return proc.returncode, out, data
         except Exception:
             return proc.returncode, out, None
     return proc.returncode, out, None
 
-def _ensure_registry_mapping(api_key_info: dict, name: str):
-    """Ensure the DB has an entry mapping this API key to the Docker container id (by name)."""
+def _ensure_registry_mapping(api_key_info: dict, name: str) -> Optional[Dict[str, Any]]:
+    """Ensure the DB has an entry mapping this API key to the Docker container id (by name).
+
+    Returns the inspect payload it looked up so callers can serialize from it.
+    """
     info = inspect_container(name)
     if not info:
-        return
+        return None
     container_id = info.get("Id")
     if not container_id:
-        return
+        return info
     image_ref = (info.get("Config") or {}).get("Image")
-    conn = get_db()
+    with db_write() as conn:
+        conn.execute(
+            SQL_CONTAINER_INSERT,
+            (api_key_info["id"], container_id, name, image_ref, int(time.time())),
+        )
+    return info
+
+# --- In-process read paths -------------------------------------------------
+# list/status only read the script's registry and Docker state, so they are
+# answered here without forking bash, jq and docker for every request.
+# Mutations (create/start/stop/restart/remove) still go through the script,
+# which owns port allocation, nginx configs and the registry lock. Entries
+# whose container has vanished are skipped here and purged by the inactivity
+# watcher's sweep, so a read never takes the mutation lock.
+
+REGISTRY_FILE = Path(os.environ.get(
+    "ALBERT_REGISTRY_FILE",
+    "/opt/albert-ai-sandbox-manager/config/container-registry.json",
+))
+
+def load_registry() -> Optional[List[Dict[str, Any]]]:
+    """Return the sandbox registry entries, or None if the file is unusable."""
+    try:
+        with REGISTRY_FILE.open("r", encoding="utf-8") as fh:
+            registry = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return registry if isinstance(registry, list) else None
+
+HOST_IP_TTL = 60.0
+_host_ip_cache: Tuple[float, str] = (0.0, "")
+
+def _host_ip() -> str:
+    """First address from `hostname -I`, which the script uses for its URLs.
+
+    Re-read every HOST_IP_TTL seconds so a DHCP change is picked up.
+    """
+    global _host_ip_cache
+    now = time.monotonic()
+    expires, ip = _host_ip_cache
+    if expires > now:
+        return ip
     try:
-        # Upsert-like: ignore if exists
-        existing = conn.execute("SELECT 1 FROM containers WHERE container_id=?", (container_id,)).fetchone()
-        if not existing:
-            conn.execute(
-                "INSERT INTO containers(api_key_id, container_id, name, image, created_at) VALUES(?,?,?,?,?)",
-                (api_key_info["id"], container_id, name, image_ref, int(time.time())),
-            )
-            conn.commit()
-    finally:
-        conn.close()
+        out = subprocess.run(["hostname", "-I"], capture_output=True, text=True, timeout=5).stdout
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        out = ""
+    parts = out.split()
+    ip = parts[0] if parts else ""
+    _host_ip_cache = (now + HOST_IP_TTL, ip)
+    return ip
+
+def _owned_by(info: Dict[str, Any], api_key_hash: str) -> bool:
+    labels = (info.get("Config") or {}).get("Labels") or {}
+    return labels.get(LABEL_APIKEY_HASH) == api_key_hash
+
+def _registry_row(entry: Dict[str, Any], info: Dict[str, Any], api_key_hash: str) -> Dict[str, Any]:
+    """Build the same JSON row the script's list command prints."""
+    def port(key: str) -> Optional[str]:
+        value = entry.get(key)
+        return None if value is None else str(value)
+    return {
+        "name": entry.get("name"),
+        "status": "running" if (info.get("State") or {}).get("Running") else "stopped",
+        "ownerHash": api_key_hash,
+        "persistent": bool(entry.get("persistent", False)),
+        "ports": {
+            "novnc": port("port"),
+            "vnc": port("vnc_port"),
+            "mcphub": port("mcphub_port"),
+            "filesvc": port("filesvc_port"),
+        },
+    }
+
+def list_sandboxes(api_key_hash: str, names: Optional[set] = None) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]]:
+    """Return (rows, inspect payloads by name) for the key's sandboxes.
+
+    ``names`` optionally restricts the result to those sandbox names.
+    None means the registry could not be read and the caller should fall
+    back to the script. Registry entries whose container is gone are
+    skipped; the inactivity watcher purges them.
+    """
+    registry = load_registry()
+    if registry is None:
+        return None
+    if names is not None:
+        registry = [e for e in registry if isinstance(e, dict) and e.get("name") in names]
+    infos = inspect_containers([e.get("name") for e in registry if isinstance(e, dict) and e.get("name")])
+    rows = []
+    for entry in registry:
+        if not isinstance(entry, dict) or not entry.get("name"):
+            continue
+        info = infos.get(entry["name"])
+        if info is not None and _owned_by(info, api_key_hash):
+            rows.append(_registry_row(entry, info, api_key_hash))
+    return rows, infos
+
+def sandbox_status(api_key_hash: str, name: str) -> Optional[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """Return (inspect payload, status row) for one sandbox owned by the key.
+
+    The row is None when the sandbox is unknown, gone or owned by another
+    key. None overall means the registry could not be read.
+    """
+    registry = load_registry()
+    if registry is None:
+        return None
+    entry = next((e for e in registry if isinstance(e, dict) and e.get("name") == name), None)
+    if entry is None:
+        return None, None
+    info = inspect_container(name)
+    if info is None:
+        return None, None
+    if not _owned_by(info, api_key_hash):
+        return info, None
+    row = _registry_row(entry, info, api_key_hash)
+    row["created"] = str(entry.get("created", ""))
+    row["resources"] = ""
+    host = _host_ip()
+    row["urls"] = {
+        "desktop": f"http://{host}/{name}/",
+        "mcphub": f"http://{host}/{name}/mcphub/mcp",
+        "files": f"http://{host}/{name}/files/",
+    }
+    return info, row
+
+def conditional_json(payload: Any):
+    """jsonify() with an ETag of the body, answering 304 when If-None-Match matches.
+
+    Pollers re-fetching unchanged state get an empty 304 instead of the body.
+    """
+    response = jsonify(payload)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.add_etag()
+    return response.make_conditional(request)
 
 # --- Error handlers --------------------------------------------------------
 
@@ -330,8 +807,10 @@ def create_container():
     sandbox_name = data.get("name") or requested_name
     if not sandbox_name:
         return jsonify({"error": "Sandbox create returned no name", "details": raw}), 500
-    _ensure_registry_mapping(auth_info, sandbox_name)
-    ser = serialize_container(sandbox_name)
+    # The name may have been inspected (and cached) before it existed
+    invalidate_inspect_cache(sandbox_name)
+    info = _ensure_registry_mapping(auth_info, sandbox_name)
+    ser = serialize_from_info(info, sandbox_name)
     ser.update(_extract_script_metadata(data))
     ser["sandboxName"] = sandbox_name
     return jsonify({"container": ser}), 201
@@ -344,56 +823,96 @@ def list_containers():
     auth_info, err = require_api_key()
     if err:
         return err
-    rc, raw, data = _run_script(["list"], auth_info["key_hash"], expect_json=True)
-    if rc != 0 or not isinstance(data, list):
-        return jsonify({"error": "List failed", "details": raw, "exitCode": rc}), 500
-    # Attach docker IDs where possible
+    ids = request.args.get("ids")
+    wanted = {i for i in (p.strip() for p in ids.split(",")) if i} if ids is not None else None
+    local = list_sandboxes(auth_info["key_hash"], wanted)
+    if local is not None:
+        data, infos = local
+    else:
+        # Registry unreadable: let the script answer
+        rc, raw, data = _run_script(["list"], auth_info["key_hash"], expect_json=True)
+        if rc != 0 or not isinstance(data, list):
+            return jsonify({"error": "List failed", "details": raw, "exitCode": rc}), 500
+        if wanted is not None:
+            data = [entry for entry in data if entry.get("name") in wanted]
+        # Attach docker IDs where possible (one inspect call for all entries)
+        names = [entry.get("name") for entry in data if entry.get("name")]
+        infos = inspect_containers(names)
     enriched = []
     for entry in data:
         name = entry.get("name")
-        details = serialize_container(name) if name else {}
+        details = serialize_from_info(infos.get(name), name) if name else {}
         details.update(_extract_script_metadata(entry))
         if name:
             details.setdefault("name", name)
             details["sandboxName"] = name
         enriched.append(details)
-    return jsonify({"containers": enriched})
+    return conditional_json({"containers": enriched})
 
 @app.get("/containers/<cid>")
 def get_container(cid: str):
     auth_info, err = require_api_key()
     if err:
         return err
-    # Use script status (single) to reflect registry & ports
-    rc, raw, data = _run_script(["status", cid], auth_info["key_hash"], expect_json=True)
-    if rc != 0 or not isinstance(data, (dict, list)):
-        return jsonify({"error": "Status failed", "details": raw, "exitCode": rc}), 404
-    if isinstance(data, list):
-        # script may return list when filtering; pick matching name
-        match = next((d for d in data if d.get("name") == cid), None)
+    local = sandbox_status(auth_info["key_hash"], cid)
+    if local is not None:
+        info, match = local
+        if match is None:
+            return jsonify({"error": "Container not found"}), 404
+        ser = serialize_from_info(info, cid)
     else:
-        match = data
-    if not match:
-        return jsonify({"error": "Container not found"}), 404
-    if isinstance(match, dict) and match.get("error"):
-        if match.get("error") == "not_found":
+        # Registry unreadable: use script status (single) instead
+        rc, raw, data = _run_script(["status", cid], auth_info["key_hash"], expect_json=True)
+        if rc != 0 or not isinstance(data, (dict, list)):
+            return jsonify({"error": "Status failed", "details": raw, "exitCode": rc}), 404
+        if isinstance(data, list):
+            # script may return list when filtering; pick matching name
+            match = next((d for d in data if d.get("name") == cid), None)
+        else:
+            match = data
+        if not match:
             return jsonify({"error": "Container not found"}), 404
-        return jsonify({"error": "Status failed", "details": match}), 500
-    # Enrich with docker info
-    ser = serialize_container(cid)
+        if isinstance(match, dict) and match.get("error"):
+            if match.get("error") == "not_found":
+                return jsonify({"error": "Container not found"}), 404
+            return jsonify({"error": "Status failed", "details": match}), 500
+        # Enrich with docker info
+        ser = serialize_container(cid)
     ser.update(_extract_script_metadata(match))
     ser["sandboxName"] = cid
-    return jsonify({"container": ser})
+    return conditional_json({"container": ser})
+
+# Lifecycle operation -> (script arguments after the name, error label)
+LIFECYCLE_OPS = {
+    "start": ([], "Start failed"),
+    "stop": ([], "Stop failed"),
+    "restart": ([], "Restart failed"),
+    "delete": (["--remove-volumes"], "Remove failed"),
+}
+
+def run_lifecycle(op: str, cid: str, auth_info: dict) -> Optional[Dict[str, Any]]:
+    """Run one lifecycle operation through the script; return an error payload or None."""
+    extra, label = LIFECYCLE_OPS[op]
+    command = "remove" if op == "delete" else op
+    with _mutate_lock:
+        rc, raw, _ = _run_script([command, cid] + extra, auth_info["key_hash"], expect_json=False)
+        invalidate_inspect_cache(cid)
+    if rc != 0:
+        return {"error": label, "details": raw, "exitCode": rc}
+    if op == "delete":
+        # DB cleanup (best-effort)
+        with db_write() as conn:
+            conn.execute(SQL_CONTAINER_DELETE, (auth_info["id"], cid))
+    return None
 
 @app.post("/containers/<cid>/start")
 def start_container(cid: str):
     auth_info, err = require_api_key()
     if err:
         return err
-    with _mutate_lock:
-        rc, raw, data = _run_script(["start", cid], auth_info["key_hash"], expect_json=True)
-    if rc != 0:
-        return jsonify({"error": "Start failed", "details": raw, "exitCode": rc}), 500
+    failure = run_lifecycle("start", cid, auth_info)
+    if failure:
+        return jsonify(failure), 500
     return get_container(cid)
 
 @app.post("/containers/<cid>/stop")
@@ -401,10 +920,9 @@ def stop_container(cid: str):
     auth_info, err = require_api_key()
     if err:
         return err
-    with _mutate_lock:
-        rc, raw, data = _run_script(["stop", cid], auth_info["key_hash"], expect_json=False)
-    if rc != 0:
-        return jsonify({"error": "Stop failed", "details": raw, "exitCode": rc}), 500
+    failure = run_lifecycle("stop", cid, auth_info)
+    if failure:
+        return jsonify(failure), 500
     return get_container(cid)
 
 @app.post("/containers/<cid>/restart")
@@ -412,10 +930,9 @@ def restart_container(cid: str):
     auth_info, err = require_api_key()
     if err:
         return err
-    with _mutate_lock:
-        rc, raw, data = _run_script(["restart", cid], auth_info["key_hash"], expect_json=False)
-    if rc != 0:
-        return jsonify({"error": "Restart failed", "details": raw, "exitCode": rc}), 500
+    failure = run_lifecycle("restart", cid, auth_info)
+    if failure:
+        return jsonify(failure), 500
     return get_container(cid)
 
 @app.patch("/containers/<cid>/persistent")
@@ -427,14 +944,16 @@ def set_persistent(cid: str):
     body = request.get_json(silent=True) or {}
     persistent = body.get("persistent", True)
     # Verify ownership by running a status check
-    rc, raw, data = _run_script(["status", cid], auth_info["key_hash"], expect_json=True)
-    if rc != 0:
-        return jsonify({"error": "Container not found", "details": raw}), 404
+    local = sandbox_status(auth_info["key_hash"], cid)
+    if local is not None:
+        if local[1] is None:
+            return jsonify({"error": "Container not found"}), 404
+    else:
+        rc, raw, data = _run_script(["status", cid], auth_info["key_hash"], expect_json=True)
+        if rc != 0:
+            return jsonify({"error": "Container not found", "details": raw}), 404
     # Update registry directly
-    registry_file = Path(os.environ.get(
-        "ALBERT_REGISTRY_FILE",
-        "/opt/albert-ai-sandbox-manager/config/container-registry.json",
-    ))
+    registry_file = REGISTRY_FILE
     with _mutate_lock:
         try:
             with registry_file.open("r", encoding="utf-8") as fh:
@@ -460,23 +979,75 @@ def delete_container(cid: str):
     auth_info, err = require_api_key()
     if err:
         return err
-    with _mutate_lock:
-        rc, raw, _ = _run_script(["remove", cid, "--remove-volumes"], auth_info["key_hash"], expect_json=False)
-    if rc != 0:
-        return jsonify({"error": "Remove failed", "details": raw, "exitCode": rc}), 500
-    # DB cleanup (best-effort)
-    conn = get_db()
-    try:
-        conn.execute("DELETE FROM containers WHERE api_key_id=? AND name=?", (auth_info["id"], cid))
-        conn.commit()
-    finally:
-        conn.close()
+    failure = run_lifecycle("delete", cid, auth_info)
+    if failure:
+        return jsonify(failure), 500
     return jsonify({"deleted": cid})
 
+BATCH_MAX_IDS = 100
+
+@app.post("/containers:batch")
+def batch_containers():
+    """Apply one lifecycle operation to several sandboxes in a single request.
+
+    The script runs are still serialized by _mutate_lock; the saving is the
+    client round-trips. Each id gets its own result entry.
+    """
+    auth_info, err = require_api_key()
+    if err:
+        return err
+    body = request.get_json(silent=True) or {}
+    op = body.get("op")
+    ids = body.get("ids")
+    if op not in LIFECYCLE_OPS:
+        return jsonify({"error": "op must be one of: " + ", ".join(LIFECYCLE_OPS)}), 400
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, str) and i for i in ids):
+        return jsonify({"error": "ids must be a non-empty list of container names"}), 400
+    if len(ids) > BATCH_MAX_IDS:
+        return jsonify({"error": f"At most {BATCH_MAX_IDS} ids per batch"}), 400
+    results = []
+    for cid in dict.fromkeys(ids):
+        failure = run_lifecycle(op, cid, auth_info)
+        item = {"id": cid, "ok": failure is None}
+        if failure:
+            item.update(failure)
+        results.append(item)
+    return jsonify({"op": op, "results": results})
+
 # --- Main ------------------------------------------------------------------
 
+def _serve_gunicorn() -> bool:
+    """Serve with gunicorn's threaded worker if it is installed."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        return False
+
+    class ManagerApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"0.0.0.0:{PORT}")
+            # A single process on purpose: _mutate_lock and the in-memory
+            # caches only coordinate threads within one process, and the
+            # sandbox script must never run two mutations at once.
+            self.cfg.set("workers", 1)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", THREADS)
+            # Keep idle client connections open longer than the 2 s default
+            # so pollers reuse them (above typical proxy idle timeouts).
+            self.cfg.set("keepalive", 65)
+            # Replaces the worker's no-op WINCH handler with the key reload
+            self.cfg.set("post_worker_init", _install_reload_handler)
+
+        def load(self):
+            return app
+
+    ManagerApplication().run()
+    return True
+
 def main():
-    app.run(host="0.0.0.0", port=PORT)
+    if not _serve_gunicorn():
+        _install_reload_handler()
+        app.run(host="0.0.0.0", port=PORT, threaded=True)
 
 if __name__ == "__main__":
     main()
@@ -2,18 +2,37 @@
 """Monitor nginx access log and stop idle sandbox containers."""
 from __future__ import annotations
 
+import argparse
+import calendar
+import ctypes
 import fcntl
+import functools
+import http.client
 import json
 import os
 import re
+import select
 import shutil
+import signal
+import socket
+import struct
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, Optional, Tuple
+from typing import Dict, FrozenSet, Iterable, Iterator, Optional, Set, Tuple
+from urllib.parse import quote
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json fallback
+    orjson = None
+
+# Both accept bytes, so files and subprocess output are parsed without decoding
+json_loads = orjson.loads if orjson is not None else json.loads
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DEFAULT_STATE_PATH = BASE_DIR / "data" / "container-activity.json"
@@ -32,12 +51,16 @@ REGISTRY_FILE = Path(
     )
 )
 STATE_PATH = Path(os.environ.get("ALBERT_INACTIVITY_STATE", str(DEFAULT_STATE_PATH)))
+DOCKER_SOCKET = os.environ.get("ALBERT_DOCKER_SOCKET", "/var/run/docker.sock")
 THRESHOLD_SECONDS = DEFAULT_THRESHOLD_SECONDS
 LOG_PATH = DEFAULT_LOG_PATH
+SWEEP_INTERVAL_SECONDS = int(os.environ.get("ALBERT_WATCHER_INTERVAL", "60"))
+MAX_STOP_WORKERS = 8
 
-LINE_TS_PATTERN = re.compile(r"\[(?P<ts>[^\]]+)\]")
-# Extract request path from the quoted request portion (e.g. "GET /path HTTP/1.1")
-REQUEST_PATH_PATTERN = re.compile(r'"[A-Z]+ ([^" ]+)')
+# Timestamp ("[10/Nov/2024:12:34:56 +0000]") and request path from the quoted
+# request portion ("GET /path HTTP/1.1") in one pass over the raw bytes.
+# No part may cross a newline, so it can run over a whole block of lines.
+LINE_PATTERN = re.compile(rb'\[([^\]\n]+)\][^"\n]*"[A-Z]+ ([^" \n]+)')
 
 
 def debug(msg: str) -> None:
@@ -52,65 +75,127 @@ class ContainerRecord:
     created_at: float
 
 
-def load_state(state_path: Path) -> Dict[str, Dict[str, float]]:
+# State file layout: {"log": {"inode": .., "pos": ..}, "containers": {name: [last_seen, running_since]}}
+# where 0 means unknown. One list per container keeps lookups and the file small.
+State = Dict[str, Dict[str, object]]
+LAST_SEEN = 0
+RUNNING_SINCE = 1
+
+
+def load_state(state_path: Path) -> State:
     if not state_path.exists():
-        return {"log": {}, "containers": {}, "running_since": {}, "stop_history": {}}
+        return {"log": {}, "containers": {}}
     try:
-        with state_path.open("r", encoding="utf-8") as fh:
-            data = json.load(fh)
-        for key in ("containers", "running_since", "stop_history"):
-            data.setdefault(key, {})
+        data = json_loads(state_path.read_bytes())
         data.setdefault("log", {})
+        containers = data.get("containers") or {}
+        running_since = data.pop("running_since", None) or {}
+        data.pop("stop_history", None)
+        if running_since or any(not isinstance(entry, list) for entry in containers.values()):
+            # Older files kept separate {name: last_seen} and {name: running_since} maps
+            containers = {
+                name: [float(value), 0.0] if not isinstance(value, list) else value
+                for name, value in containers.items()
+            }
+            for name, since in running_since.items():
+                containers.setdefault(name, [0.0, 0.0])[RUNNING_SINCE] = float(since)
+        data["containers"] = containers
         return data
     except Exception as exc:  # pragma: no cover - defensive path
         print(f"[WARN] Failed to load state file {state_path}: {exc}", file=sys.stderr)
-        return {"log": {}, "containers": {}, "running_since": {}, "stop_history": {}}
+        return {"log": {}, "containers": {}}
 
 
-def save_state(state_path: Path, state: Dict[str, Dict[str, float]]) -> None:
-    state_path.parent.mkdir(parents=True, exist_ok=True)
+def dump_state(state: State) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(state)
+    return json.dumps(state).encode("utf-8")
+
+
+def save_state(state_path: Path, state: State) -> None:
+    """Atomically replace the state file, unless its content is unchanged.
+
+    Most ticks see no new traffic and stop nothing, so comparing against the
+    small file on disk skips the write, fsync and rename entirely.
+    """
+    data = dump_state(state)
+    try:
+        if state_path.read_bytes() == data:
+            return
+    except OSError:
+        state_path.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = state_path.with_suffix(".tmp")
-    with tmp_path.open("w", encoding="utf-8") as fh:
-        json.dump(state, fh)
-    tmp_path.replace(state_path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, state_path)
+
+
+_MONTHS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+# Consecutive log lines usually share the same second; remember the last one.
+_last_nginx_ts: Tuple[Optional[str], Optional[float]] = (None, None)
 
 
 def parse_nginx_timestamp(value: str) -> Optional[float]:
-    """Return epoch seconds from nginx log timestamp."""
+    """Return epoch seconds from nginx log timestamp.
+
+    Parses the fixed $time_local layout "dd/Mon/YYYY:HH:MM:SS +ZZZZ" by
+    slicing rather than strptime, which re-interprets the format per call.
+    """
+    global _last_nginx_ts
+    if value == _last_nginx_ts[0]:
+        return _last_nginx_ts[1]
     try:
-        dt = datetime.strptime(value, "%d/%b/%Y:%H:%M:%S %z")
-        return dt.timestamp()
-    except Exception:
+        if len(value) != 26 or value[21] not in "+-":
+            return None
+        month = _MONTHS[value[3:6]]
+        epoch = calendar.timegm((
+            int(value[7:11]), month, int(value[0:2]),
+            int(value[12:14]), int(value[15:17]), int(value[18:20]),
+            0, 0, 0,
+        ))
+        offset = int(value[22:24]) * 3600 + int(value[24:26]) * 60
+    except (KeyError, ValueError):
         return None
+    epoch = float(epoch - offset if value[21] == "+" else epoch + offset)
+    _last_nginx_ts = (value, epoch)
+    return epoch
+
+
+# RFC 3339 as Docker emits it: nanosecond fraction, "Z" or numeric offset.
+# Also accepts the CLI's "2024-11-10 12:34:56 +0000 UTC" (docker ps CreatedAt).
+DOCKER_TIMESTAMP = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))? ?(Z|([+-])(\d{2}):?(\d{2}))?(?: [A-Z]+)?"
+)
 
 
+@functools.lru_cache(maxsize=1024)
 def parse_docker_timestamp(value: Optional[str]) -> Optional[float]:
+    """Return epoch seconds from a Docker timestamp (naive values are UTC).
+
+    Created/StartedAt only change when a container is recreated or restarted,
+    so the same strings come back every tick and are answered from the cache.
+    """
     if not value or value.startswith("0001-01-01T00:00:00"):
         return None
-    text = value
-    if text.endswith("Z"):
-        text = text[:-1] + "+00:00"
-    if "." in text:
-        head, tail = text.split(".", 1)
-        frac = ""
-        tz = ""
-        for char in tail:
-            if char.isdigit():
-                frac += char
-            else:
-                tz = tail[len(frac):]
-                break
-        else:
-            tz = ""
-        frac = (frac + "000000")[:6]
-        text = head + "." + frac + tz
-    try:
-        dt = datetime.fromisoformat(text)
-    except ValueError:
+    match = DOCKER_TIMESTAMP.fullmatch(value)
+    if match is None:
         return None
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt.timestamp()
+    year, month, day, hour, minute, second, frac, _, sign, tz_hours, tz_minutes = match.groups()
+    epoch = calendar.timegm((int(year), int(month), int(day), int(hour), int(minute), int(second), 0, 0, 0))
+    if sign:
+        offset = int(tz_hours) * 3600 + int(tz_minutes) * 60
+        epoch = epoch - offset if sign == "+" else epoch + offset
+    # Truncate to microseconds, as datetime did
+    return epoch + (int(frac[:6].ljust(6, "0")) / 1e6 if frac else 0.0)
 
 
 def extract_container_from_path(path: str) -> Optional[str]:
@@ -128,72 +213,243 @@ def extract_container_from_path(path: str) -> Optional[str]:
     return candidate
 
 
-def iter_new_log_lines(log_path: Path, state: Dict[str, Dict[str, float]]) -> Iterable[str]:
-    if not log_path.exists():
-        return []
+LOG_READ_CHUNK = 16 * 1024 * 1024
+
+
+def new_log_chunks(log_path: Path, state: State) -> Iterator[bytes]:
+    """Yield the part of the log written since the last run, in chunks.
+
+    Each chunk holds only complete lines; the saved position advances past
+    a chunk once the caller has consumed it, so a line nginx is still
+    writing is picked up whole next time. pread() rather than mmap: a log
+    truncated in place (copytruncate) would fault a mapping with SIGBUS,
+    here it only shortens the read.
+    """
     log_state = state.setdefault("log", {})
     try:
-        with log_path.open("r", encoding="utf-8", errors="ignore") as handle:
-            stat = handle.fileno()
-            file_stat = os.fstat(stat)
-            inode = log_state.get("inode")
-            pos = log_state.get("pos", 0)
-            if inode == file_stat.st_ino and isinstance(pos, (int, float)) and pos <= file_stat.st_size:
-                handle.seek(int(pos))
-            else:
-                # Log rotated or state missing; read from start
-                debug("Log rotation detected or no previous position; reading from beginning")
-            for line in handle:
-                yield line
-            log_state["pos"] = handle.tell()
-            log_state["inode"] = file_stat.st_ino
+        fd = os.open(log_path, os.O_RDONLY | os.O_CLOEXEC)
     except FileNotFoundError:
-        return []
+        return
+    try:
+        file_stat = os.fstat(fd)
+        pos = log_state.get("pos", 0)
+        if log_state.get("inode") != file_stat.st_ino or not isinstance(pos, (int, float)) or pos > file_stat.st_size:
+            # Log rotated, truncated or state missing; read from start
+            debug("Log rotation detected or no previous position; reading from beginning")
+            pos = 0
+        pos = int(pos)
+        log_state["inode"] = file_stat.st_ino
+        log_state["pos"] = pos
+        if hasattr(os, "posix_fadvise"):
+            # Read front to back once: let the kernel read ahead aggressively
+            os.posix_fadvise(fd, pos, 0, os.POSIX_FADV_SEQUENTIAL)
+        while pos < file_stat.st_size:
+            data = os.pread(fd, min(LOG_READ_CHUNK, file_stat.st_size - pos), pos)
+            if not data:
+                return
+            end = data.rfind(b"\n") + 1
+            if not end:
+                if len(data) < LOG_READ_CHUNK:
+                    return
+                # A single over-long line is not a request we can parse
+                end = len(data)
+            yield data[:end] if end < len(data) else data
+            pos += end
+            log_state["pos"] = pos
+    finally:
+        os.close(fd)
+
+
+# Path prefixes served by the manager itself, not by a sandbox
+IGNORED_NAMES = frozenset({b"manager", b"mcphub"})
+
+
+def update_activity_from_logs(state: State, known: Optional[Set[bytes]] = None) -> None:
+    """Record the latest request time per container from new log lines.
+
+    ``known`` (container names as bytes) lets lines for anything else be
+    dropped on the raw path segment, before decoding or timestamp parsing.
+    The first unknown name in a batch re-reads the registry into ``known``
+    (a stat when unchanged), so sandboxes created since the last sweep are
+    not skipped past.
+    """
+    containers_state = state["containers"]
+    refreshed = False
+    for chunk in new_log_chunks(LOG_PATH, state):
+        for match in LINE_PATTERN.finditer(chunk):
+            ts, path = match.groups()
+            if known is not None:
+                segments = path.split(b"/", 2)
+                if len(segments) < 2 or segments[0]:
+                    continue
+                if segments[1] not in known:
+                    if refreshed:
+                        continue
+                    refreshed = True
+                    known.update(name.encode() for name in load_registry())
+                    known -= IGNORED_NAMES
+                    if segments[1] not in known:
+                        continue
+                name = segments[1].decode("utf-8", "ignore")
+            else:
+                name = extract_container_from_path(path.decode("utf-8", "ignore"))
+                if not name:
+                    continue
+            epoch = parse_nginx_timestamp(ts.decode("ascii", "ignore"))
+            if epoch is None:
+                continue
+            entry = containers_state.get(name)
+            if entry is None:
+                containers_state[name] = [epoch, 0.0]
+            elif epoch > entry[LAST_SEEN]:
+                entry[LAST_SEEN] = epoch
+            else:
+                continue
+            debug(f"Activity recorded for {name} at {epoch}")
 
 
-def update_activity_from_logs(state: Dict[str, Dict[str, float]]) -> None:
-    for line in iter_new_log_lines(LOG_PATH, state):
-        ts_match = LINE_TS_PATTERN.search(line)
-        if not ts_match:
-            continue
-        epoch = parse_nginx_timestamp(ts_match.group("ts"))
-        if epoch is None:
-            continue
-        req_match = REQUEST_PATH_PATTERN.search(line)
-        if not req_match:
-            continue
-        path = req_match.group(1)
-        name = extract_container_from_path(path)
-        if not name:
-            continue
-        containers_state = state.setdefault("containers", {})
-        previous = containers_state.get(name, 0)
-        if epoch > previous:
-            containers_state[name] = epoch
-            debug(f"Activity recorded for {name} at {epoch}")
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection to a UNIX socket (the Docker Engine API)."""
+
+    def __init__(self, socket_path: str, timeout: float = 15) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+_docker_local = threading.local()
+
+
+def docker_request(method: str, path: str, timeout: float = 15) -> Optional[Tuple[int, bytes]]:
+    """Call the Docker Engine API over its socket, reusing one keep-alive connection per thread.
+
+    Returns (status, body), or None when the daemon cannot be reached so
+    callers can fall back to the docker CLI.
+    """
+    for attempt in range(2):
+        conn = getattr(_docker_local, "conn", None)
+        if conn is None:
+            conn = _docker_local.conn = UnixHTTPConnection(DOCKER_SOCKET)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request(method, path)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            # The daemon may have closed the idle connection; retry once fresh
+            conn.close()
+            _docker_local.conn = None
+    return None
+
+
+def docker_api_inspect(name: str) -> Tuple[bool, Optional[Dict[str, object]]]:
+    """Inspect via the API: (reachable, payload or None if missing)."""
+    reply = docker_request("GET", f"/containers/{quote(name, safe='')}/json")
+    if reply is None:
+        return False, None
+    status, body = reply
+    if status != 200:
+        return True, None
+    try:
+        return True, json_loads(body)
+    except ValueError:
+        return True, None
 
 
 def inspect_container_state(name: str) -> Optional[Dict[str, object]]:
+    reachable, info = docker_api_inspect(name)
+    if reachable:
+        return info
     try:
         result = subprocess.run(
             ["docker", "inspect", name],
             capture_output=True,
-            text=True,
             check=True,
             timeout=15,
         )
     except (subprocess.SubprocessError, FileNotFoundError):
         return None
     try:
-        data = json.loads(result.stdout)
-    except json.JSONDecodeError:
+        data = json_loads(result.stdout)
+    except ValueError:
         return None
     if not data:
         return None
     return data[0]
 
 
-def list_managed_container_names() -> Iterable[str]:
+def inspect_containers(names: Iterable[str]) -> Dict[str, Dict[str, object]]:
+    """Inspect several containers, keyed by name.
+
+    Uses the Docker API over one kept-alive socket connection, or a single
+    docker CLI call for all names if the socket is unusable.
+    """
+    names = list(names)
+    if not names:
+        return {}
+    infos: Dict[str, Dict[str, object]] = {}
+    for name in names:
+        reachable, info = docker_api_inspect(name)
+        if not reachable:
+            break  # fall back to the CLI below
+        if info:
+            infos[name] = info
+    else:
+        return infos
+    try:
+        # No check=True: docker inspect exits non-zero if any name vanished
+        # in the meantime but still prints the payload for the others.
+        result = subprocess.run(
+            ["docker", "inspect", *names],
+            capture_output=True,
+            timeout=30,
+        )
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return {}
+    try:
+        data = json_loads(result.stdout or b"[]")
+    except ValueError:
+        return {}
+    infos = {}
+    for info in data or []:
+        name = (info.get("Name") or "").lstrip("/")
+        if name:
+            infos[name] = info
+    return infos
+
+
+MANAGED_FILTER = quote(json.dumps({"label": ["albert.manager=1"]}), safe="")
+
+
+def list_managed_containers() -> Dict[str, ContainerRecord]:
+    """Running managed containers by name, with owner and creation time.
+
+    The listing already carries labels and creation time, so containers
+    that turn out to be busy never need an inspect.
+    """
+    reply = docker_request("GET", f"/containers/json?filters={MANAGED_FILTER}")
+    if reply is not None and reply[0] == 200:
+        try:
+            records = {}
+            for c in json_loads(reply[1]):
+                if not c.get("Names"):
+                    continue
+                name = c["Names"][0].lstrip("/")
+                records[name] = ContainerRecord(
+                    name=name,
+                    key_hash=(c.get("Labels") or {}).get("albert.apikey_hash", ""),
+                    created_at=float(c.get("Created") or 0),
+                )
+            return records
+        except (ValueError, KeyError, TypeError):
+            pass
     try:
         result = subprocess.run(
             [
@@ -202,7 +458,7 @@ def list_managed_container_names() -> Iterable[str]:
                 "--filter",
                 "label=albert.manager=1",
                 "--format",
-                "{{.Names}}",
+                '{{.Names}}\t{{.Label "albert.apikey_hash"}}\t{{.CreatedAt}}',
             ],
             capture_output=True,
             text=True,
@@ -210,19 +466,25 @@ def list_managed_container_names() -> Iterable[str]:
             timeout=15,
         )
     except (subprocess.SubprocessError, FileNotFoundError):
-        return []
-    names = []
+        return {}
+    records = {}
     for line in result.stdout.splitlines():
-        line = line.strip()
-        if line:
-            names.append(line)
-    return names
+        name, _, rest = line.strip().partition("\t")
+        if not name:
+            continue
+        key_hash, _, created = rest.partition("\t")
+        records[name] = ContainerRecord(
+            name=name,
+            key_hash=key_hash,
+            created_at=parse_docker_timestamp(created) or 0,
+        )
+    return records
 
 
-def collect_container_record(name: str) -> Optional[Tuple[ContainerRecord, Dict[str, object], Optional[float]]]:
-    info = inspect_container_state(name)
+def collect_container_record(info: Optional[Dict[str, object]]) -> Optional[Tuple[ContainerRecord, Dict[str, object], Optional[float]]]:
     if not info:
         return None
+    name = (info.get("Name") or "").lstrip("/")
     state = info.get("State") or {}
     if not state.get("Running"):
         return None
@@ -240,12 +502,26 @@ def collect_container_record(name: str) -> Optional[Tuple[ContainerRecord, Dict[
     return record, state, started_at
 
 
+# (inode, mtime, size) of the registry file last parsed, and the result
+_registry_cache: Tuple[Optional[Tuple[int, int, int]], Dict[str, Dict[str, str]]] = (None, {})
+
+
 def load_registry() -> Dict[str, Dict[str, str]]:
-    if not REGISTRY_FILE.exists():
+    """Registry entries by container name; callers must not modify the result.
+
+    The file only changes on create/delete, so the parsed dict is reused
+    for as long as the file's stat signature stays the same.
+    """
+    global _registry_cache
+    try:
+        st = REGISTRY_FILE.stat()
+    except OSError:
         return {}
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if signature == _registry_cache[0]:
+        return _registry_cache[1]
     try:
-        with REGISTRY_FILE.open("r", encoding="utf-8") as fh:
-            data = json.load(fh)
+        data = json_loads(REGISTRY_FILE.read_bytes())
     except Exception:
         return {}
     if not isinstance(data, list):
@@ -254,41 +530,50 @@ def load_registry() -> Dict[str, Dict[str, str]]:
     for item in data:
         if isinstance(item, dict) and item.get("name"):
             registry[item["name"]] = item
+    _registry_cache = (signature, registry)
     return registry
 
 
-def collect_active_ports() -> Dict[int, bool]:
-    if shutil.which("ss") is None:
-        return {}
-    try:
-        result = subprocess.run(
-            ["ss", "-tan"],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5,
-        )
-    except (subprocess.SubprocessError, FileNotFoundError):
-        return {}
-    active: Dict[int, bool] = {}
-    for line in result.stdout.splitlines():
-        if "ESTAB" not in line:
-            continue
-        parts = line.split()
-        if len(parts) < 4:
-            continue
-        local = parts[3]
-        if ":" not in local:
-            continue
+PROC_NET_TCP = ("/proc/net/tcp", "/proc/net/tcp6")
+TCP_ESTABLISHED = b"01"
+
+
+def collect_active_ports() -> FrozenSet[int]:
+    """Local ports with an ESTABLISHED TCP connection (IPv4 and IPv6).
+
+    Reads the kernel tables directly instead of running and parsing ss.
+    Each row looks like "sl local_address rem_address st ...", with the
+    local address as hex "ADDR:PORT" and the state as a hex code.
+    """
+    active: Set[int] = set()
+    for table in PROC_NET_TCP:
         try:
-            port = int(local.rsplit(":", 1)[1])
-        except ValueError:
+            with open(table, "rb") as fh:
+                next(fh, None)  # header
+                for line in fh:
+                    fields = line.split(None, 4)
+                    if len(fields) < 4 or fields[3] != TCP_ESTABLISHED:
+                        continue
+                    try:
+                        active.add(int(fields[1][-4:], 16))
+                    except ValueError:
+                        continue
+        except OSError:
             continue
-        active[port] = True
-    return active
+    return frozenset(active)
 
 
 def stop_container(name: str, key_hash: str) -> bool:
+    # Fast path: the script's stop only checks the ownership label (which
+    # key_hash was read from) and runs docker stop, so ask the daemon directly.
+    reply = docker_request("POST", f"/containers/{quote(name, safe='')}/stop", timeout=60)
+    if reply is not None:
+        status, body = reply
+        if status in (204, 304):  # 304: already stopped
+            print(f"[INFO] Stopped idle container {name}")
+            return True
+        print(f"[WARN] Docker API stop for {name} failed (HTTP {status}): {body.decode('utf-8', 'replace').strip()}")
+        return False
     if not MANAGER_SCRIPT.exists():
         print(f"[WARN] Manager script not found at {MANAGER_SCRIPT}, skipping stop for {name}")
         return False
@@ -350,7 +635,36 @@ def remove_container(name: str, key_hash: str) -> bool:
     return True
 
 
-def evaluate_and_remove_expired(state: Dict[str, Dict[str, float]], now: float) -> None:
+def purge_vanished_sandboxes(running: Dict[str, ContainerRecord]) -> None:
+    """Release registry entries, nginx configs and ports of deleted sandboxes.
+
+    Containers disappear behind the manager's back (``api_key_manager.py
+    revoke``, a manual ``docker rm``). Only a definite 404 from the API counts
+    as gone, and the script re-checks before it purges anything.
+    """
+    if not MANAGER_SCRIPT.exists():
+        return
+    for name in list(load_registry()):
+        if name in running:
+            continue
+        reply = docker_request("GET", f"/containers/{quote(name, safe='')}/json")
+        if reply is None or reply[0] != 404:
+            continue
+        try:
+            result = subprocess.run(
+                [str(MANAGER_SCRIPT), "purge-missing", name],
+                capture_output=True, text=True, timeout=60,
+            )
+        except subprocess.SubprocessError as exc:
+            print(f"[ERROR] Failed to purge vanished sandbox {name}: {exc}")
+            continue
+        if result.returncode != 0:
+            print(f"[WARN] Purge of vanished sandbox {name} failed (rc={result.returncode}): {result.stderr.strip()}")
+            continue
+        print(f"[INFO] Purged metadata of vanished sandbox {name}")
+
+
+def evaluate_and_remove_expired(state: State, now: float) -> None:
     """Remove containers that have exceeded ALBERT_MAX_AGE_SECONDS since creation."""
     if MAX_AGE_SECONDS <= 0:
         return
@@ -379,59 +693,226 @@ def evaluate_and_remove_expired(state: Dict[str, Dict[str, float]], now: float)
             key_hash = labels.get("albert.apikey_hash", "")
         print(f"[INFO] Container {name} exceeded max age ({age:.0f}s > {MAX_AGE_SECONDS}s), removing")
         if remove_container(name, key_hash):
-            state.get("containers", {}).pop(name, None)
-            state.get("running_since", {}).pop(name, None)
-            state.get("stop_history", {}).pop(name, None)
+            state["containers"].pop(name, None)
 
 
-def evaluate_and_stop_idle(state: Dict[str, Dict[str, float]], now: float) -> None:
-    containers_state = state.setdefault("containers", {})
-    running_since_state = state.setdefault("running_since", {})
+def evaluate_and_stop_idle(
+    state: State,
+    now: float,
+    running: Optional[Dict[str, ContainerRecord]] = None,
+) -> None:
+    containers_state = state["containers"]
     registry = load_registry()
     active_ports = collect_active_ports()
-    for name in list_managed_container_names():
-        collected = collect_container_record(name)
-        if not collected:
-            running_since_state.pop(name, None)
+    if running is None:
+        running = list_managed_containers()
+    candidates = []
+    for name, listed in running.items():
+        if not listed.key_hash:
+            if name in containers_state:
+                containers_state[name][RUNNING_SINCE] = 0.0
             continue
-        record, _, started_at = collected
-        registry_entry = registry.get(record.name, {})
+        registry_entry = registry.get(name, {})
         candidate_ports = []
         for key in ("port", "vnc_port", "mcphub_port", "filesvc_port"):
             value = registry_entry.get(key)
             if value and str(value).isdigit():
                 candidate_ports.append(int(value))
-        if any(active_ports.get(port) for port in candidate_ports):
-            running_since_state[record.name] = max(started_at or now, running_since_state.get(record.name, 0), record.created_at or 0)
-            containers_state[record.name] = now
-            debug(f"Container {record.name} has active connections; skipping stop check")
+        if not active_ports.isdisjoint(candidate_ports):
+            entry = containers_state.setdefault(name, [0.0, 0.0])
+            entry[LAST_SEEN] = now
+            entry[RUNNING_SINCE] = max(entry[RUNNING_SINCE], listed.created_at) or now
+            debug(f"Container {name} has active connections; skipping stop check")
             continue
-        if started_at is None:
-            started_at = running_since_state.get(record.name)
-        if started_at is None:
-            started_at = now
-        prev_started = running_since_state.get(record.name, 0)
-        if started_at > prev_started:
-            running_since_state[record.name] = started_at
-        fallback = max(
-            running_since_state.get(record.name, 0),
-            float(containers_state.get(record.name, 0)),
-            record.created_at or 0,
-        )
-        last_seen = fallback or now
-        inactivity = now - last_seen
-        debug(f"Container {record.name} inactivity {inactivity:.1f}s (last {last_seen})")
-        if inactivity < THRESHOLD_SECONDS:
-            continue
-        if stop_container(record.name, record.key_hash):
-            running_since_state.pop(record.name, None)
-            containers_state[record.name] = now
+        candidates.append(name)
+    if not candidates:
+        return
+    # Only containers that may be stopped need StartedAt, which the listing lacks
+    infos = inspect_containers(candidates)
+    jobs = []
+    for name in candidates:
+        last_seen, running_since = containers_state.get(name) or (0.0, 0.0)
+        jobs.append((infos.get(name), now, running_since or None, last_seen))
+    # docker stop waits for each container's graceful shutdown; overlap them.
+    # Workers only read their arguments, state is updated here afterwards.
+    with ThreadPoolExecutor(max_workers=min(MAX_STOP_WORKERS, len(jobs))) as pool:
+        results = list(pool.map(lambda job: evaluate_one(*job), jobs))
+    for name, (running_since, stopped) in zip(candidates, results):
+        entry = containers_state.setdefault(name, [0.0, 0.0])
+        if stopped:
+            entry[LAST_SEEN] = now
+            entry[RUNNING_SINCE] = 0.0
+        else:
+            entry[RUNNING_SINCE] = running_since or 0.0
+
+
+def evaluate_one(
+    info: Optional[Dict[str, object]],
+    now: float,
+    running_since: Optional[float],
+    last_activity: float,
+) -> Tuple[Optional[float], bool]:
+    """Stop one container if it has been idle past the threshold.
+
+    Returns the container's updated running-since time (None when it is no
+    longer a running managed container) and whether it was stopped.
+    """
+    collected = collect_container_record(info)
+    if not collected:
+        return None, False
+    record, _, started_at = collected
+    if started_at is None:
+        started_at = running_since
+    if started_at is None:
+        started_at = now
+    running_since = max(started_at, running_since or 0)
+    last_seen = max(running_since, last_activity, record.created_at or 0) or now
+    inactivity = now - last_seen
+    debug(f"Container {record.name} inactivity {inactivity:.1f}s (last {last_seen})")
+    if inactivity < THRESHOLD_SECONDS:
+        return running_since, False
+    return running_since, stop_container(record.name, record.key_hash)
+
+
+def run_sweep(state: State) -> Optional[Set[bytes]]:
+    """Catch up on the log, stop/remove what is due and checkpoint the state.
+
+    Returns the container names (as bytes) the log filter should accept until
+    the next sweep, or None when Docker is not reachable.
+    """
+    if shutil.which("docker") is None and docker_request("GET", "/_ping") is None:
+        print("[WARN] Docker not reachable (no socket, no CLI); skipping inactivity check")
+        return None
+    running = list_managed_containers()
+    purge_vanished_sandboxes(running)
+    known = {name.encode() for name in running}
+    known.update(name.encode() for name in load_registry())
+    known -= IGNORED_NAMES
+    if running:
+        # Forget containers that were deleted (neither running nor registered).
+        # Skipped on an empty listing, which may just be a failed docker call.
+        containers_state = state["containers"]
+        for name in [name for name in containers_state if name.encode() not in known]:
+            del containers_state[name]
+    update_activity_from_logs(state, known)
+    now = time.time()
+    evaluate_and_stop_idle(state, now, running)
+    evaluate_and_remove_expired(state, now)
+    save_state(STATE_PATH, state)
+    return known
+
+
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def open_log_watch(log_path: Path) -> Optional[int]:
+    """Return a non-blocking inotify fd watching the log's directory, or None.
+
+    The directory is watched rather than the file so a rotated log is picked
+    up when nginx creates the new one.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(log_path.parent), IN_MODIFY | IN_CREATE | IN_MOVED_TO) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def log_touched(inotify_fd: int, log_name: bytes) -> bool:
+    """Drain pending inotify events and report whether any concern the log."""
+    touched = False
+    while True:
+        try:
+            data = os.read(inotify_fd, 65536)
+        except BlockingIOError:
+            return touched
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            if data[offset:offset + length].rstrip(b"\0") == log_name:
+                touched = True
+            offset += length
+
+
+def guarded_sweep(state: State, known: Optional[Set[bytes]]) -> Optional[Set[bytes]]:
+    """run_sweep() that logs failures and keeps the previous name filter."""
+    try:
+        return run_sweep(state)
+    except Exception as exc:  # keep the daemon alive across transient failures
+        print(f"[WARN] Inactivity sweep failed: {exc}", file=sys.stderr)
+        return known
+
+
+def run_daemon() -> int:
+    """Tail the access log as it is written and sweep on a fixed interval.
+
+    State stays in memory between sweeps; log events only move timestamps
+    forward, so it is checkpointed to disk by the sweep alone.
+    """
+    state = load_state(STATE_PATH)
+    known = guarded_sweep(state, None)
+    poller = select.epoll()
+    inotify_fd = open_log_watch(LOG_PATH)
+    if inotify_fd is None:
+        print("[WARN] inotify unavailable; reading the access log on each sweep only")
+    else:
+        poller.register(inotify_fd, select.EPOLLIN)
+    # Signals only set a flag; the wakeup pipe gets poll() to return promptly
+    wakeup_r, wakeup_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    signal.set_wakeup_fd(wakeup_w)
+    poller.register(wakeup_r, select.EPOLLIN)
+    stopping = False
+
+    def request_stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    log_name = os.fsencode(LOG_PATH.name)
+    next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+    while not stopping:
+        ready = {fd for fd, _ in poller.poll(max(0.0, next_sweep - time.monotonic()))}
+        if wakeup_r in ready:
+            while True:
+                try:
+                    os.read(wakeup_r, 512)
+                except BlockingIOError:
+                    break
+        if inotify_fd in ready and log_touched(inotify_fd, log_name) and known is not None:
+            try:
+                update_activity_from_logs(state, known)
+            except Exception as exc:  # the next sweep re-reads from the saved position
+                print(f"[WARN] Reading the access log failed: {exc}", file=sys.stderr)
+        if time.monotonic() >= next_sweep:
+            known = guarded_sweep(state, known)
+            next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+    save_state(STATE_PATH, state)
+    return 0
 
 
 WATCHER_LOCK = Path("/opt/albert-ai-sandbox-manager/config/.watcher.lock")
 
 
 def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running: follow the access log via inotify and sweep every ALBERT_WATCHER_INTERVAL seconds",
+    )
+    args = parser.parse_args()
+
     # Prevent overlapping runs (e.g. if timer fires while previous run is still active)
     lock_fd = open(WATCHER_LOCK, "w")
     try:
@@ -441,15 +922,9 @@ def main() -> int:
         return 0
 
     try:
-        if shutil.which("docker") is None:
-            print("[WARN] Docker binary not found; skipping inactivity check")
-            return 0
-        state = load_state(STATE_PATH)
-        update_activity_from_logs(state)
-        now = time.time()
-        evaluate_and_stop_idle(state, now)
-        evaluate_and_remove_expired(state, now)
-        save_state(STATE_PATH, state)
+        if args.daemon:
+            return run_daemon()
+        run_sweep(load_state(STATE_PATH))
         return 0
     finally:
         fcntl.flock(lock_fd, fcntl.LOCK_UN)
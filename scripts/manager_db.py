@@ -1,38 +0,0 @@
-"""Shared DB utilities for container manager and API key CLI."""
-import os
-import sqlite3
-from pathlib import Path
-
-DB_PATH = os.environ.get("MANAGER_DB_PATH", "./data/manager.db")
-
-SCHEMA = """
-CREATE TABLE IF NOT EXISTS api_keys (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  key_hash TEXT UNIQUE NOT NULL,
-  label TEXT,
-  created_at INTEGER NOT NULL
-);
-CREATE TABLE IF NOT EXISTS containers (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  api_key_id INTEGER NOT NULL,
-  container_id TEXT UNIQUE NOT NULL,
-  name TEXT,
-  image TEXT,
-  created_at INTEGER NOT NULL,
-  FOREIGN KEY(api_key_id) REFERENCES api_keys(id) ON DELETE CASCADE
-);
-"""
-
-def get_db():
-    Path(os.path.dirname(DB_PATH)).mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def init_db():
-    conn = get_db()
-    try:
-        conn.executescript(SCHEMA)
-        conn.commit()
-    finally:
-        conn.close()
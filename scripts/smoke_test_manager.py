@@ -19,29 +19,50 @@ import json
 import time
 import argparse
 import subprocess
-from urllib import request as urlrequest
-from urllib.error import HTTPError
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlsplit
 
 SERVICE_URL = os.environ.get("MANAGER_URL", "http://localhost:5001")
 
 
-def http(method, path, token=None, data=None):
-    url = SERVICE_URL + path
-    headers = {"Content-Type": "application/json"}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    body = None
-    if data is not None:
-        body = json.dumps(data).encode("utf-8")
-    req = urlrequest.Request(url, data=body, method=method, headers=headers)
-    try:
-        with urlrequest.urlopen(req, timeout=30) as resp:
-            return resp.getcode(), json.loads(resp.read().decode("utf-8"))
-    except HTTPError as e:
+class Client:
+    """Minimal JSON client that keeps one keep-alive connection to the service."""
+
+    # Safe to resend when the connection dropped after the request went out
+    IDEMPOTENT = frozenset({"GET", "HEAD", "DELETE"})
+
+    def __init__(self, url, token=None):
+        parts = urlsplit(url)
+        conn_class = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+        self.conn = conn_class(parts.hostname, parts.port, timeout=30)
+        self.prefix = parts.path.rstrip("/")
+        self.token = token
+
+    def call(self, method, path, data=None):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode("utf-8")
+        for attempt in range(2):
+            sent = False
+            try:
+                self.conn.request(method, self.prefix + path, body=body, headers=headers)
+                sent = True
+                resp = self.conn.getresponse()
+                raw = resp.read()
+                break
+            except (HTTPException, ConnectionError):
+                # Server closed the idle connection; reconnect once, but never
+                # resend a POST the server may already have acted on
+                self.conn.close()
+                if attempt or (sent and method not in self.IDEMPOTENT):
+                    raise
         try:
-            return e.code, json.loads(e.read().decode("utf-8"))
-        except Exception:
-            return e.code, {"error": str(e)}
+            return resp.status, json.loads(raw.decode("utf-8")) if raw else {}
+        except ValueError:
+            return resp.status, {"error": raw.decode("utf-8", "replace")}
 
 
 def main():
@@ -54,9 +75,11 @@ def main():
         print("Provide --key or set SMOKE_KEY env with a valid API key", file=sys.stderr)
         sys.exit(2)
 
+    client = Client(SERVICE_URL, key)
+
     # Create container
     print("Creating container...")
-    code, data = http("POST", "/containers", key, {"image": args.image, "autoStart": True})
+    code, data = client.call("POST", "/containers", {"image": args.image, "autoStart": True})
     print(code, data)
     if code != 201:
         print("Create failed")
@@ -64,23 +87,23 @@ def main():
     cid = data['container']['id']
 
     print("Listing containers...")
-    code, data = http("GET", "/containers", key)
+    code, data = client.call("GET", "/containers")
     print(code, data)
 
     print("Status...")
-    code, data = http("GET", f"/containers/{cid}", key)
+    code, data = client.call("GET", f"/containers/{cid}")
     print(code, data)
 
     print("Restart...")
-    code, data = http("POST", f"/containers/{cid}/restart", key)
+    code, data = client.call("POST", f"/containers/{cid}/restart")
     print(code, data)
 
     print("Stop...")
-    code, data = http("POST", f"/containers/{cid}/stop", key)
+    code, data = client.call("POST", f"/containers/{cid}/stop")
     print(code, data)
 
     print("Delete...")
-    code, data = http("DELETE", f"/containers/{cid}", key)
+    code, data = client.call("DELETE", f"/containers/{cid}")
     print(code, data)
 
     print("Done.")
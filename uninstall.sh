@@ -12,6 +12,8 @@ INSTALL_DIR="/opt/albert-ai-sandbox-manager"
 NGINX_CONF_DIR="/etc/nginx/sites-available"
 NGINX_ENABLED_DIR="/etc/nginx/sites-enabled"
 MANAGER_SERVICE_FILE="/etc/systemd/system/albert-container-manager.service"
+INACTIVITY_SERVICE_FILE="/etc/systemd/system/albert-inactivity-watcher.service"
+INACTIVITY_TIMER_FILE="/etc/systemd/system/albert-inactivity-watcher.timer"
 DEFAULT_SITE="${NGINX_ENABLED_DIR}/default"
 
 echo -e "${GREEN}========================================${NC}"
@@ -41,6 +43,16 @@ cleanup_nginx_include() {
         fi
 }
 
+# Stop the inactivity watcher first (daemon, or the timer on older installs)
+# so it neither touches containers being removed nor restarts against a
+# script that is about to be deleted
+for unit in albert-inactivity-watcher.timer albert-inactivity-watcher.service; do
+        if systemctl list-unit-files 2>/dev/null | grep -q "^${unit}"; then
+                echo -e "${YELLOW}Stopping and disabling ${unit}...${NC}"
+                systemctl disable --now "$unit" 2>/dev/null || true
+        fi
+done
+
 # Stop running Albert sandbox containers and remove them
 if command -v docker >/dev/null 2>&1; then
         containers=$(docker ps -a --filter "label=albert.manager=1" --format '{{.Names}}' 2>/dev/null || true)
@@ -73,10 +85,10 @@ if systemctl list-unit-files 2>/dev/null | grep -q '^albert-container-manager.se
         systemctl disable albert-container-manager.service 2>/dev/null || true
 fi
 
-# Remove systemd unit file
-if [ -f "$MANAGER_SERVICE_FILE" ]; then
-        echo -e "${YELLOW}Removing systemd unit file...${NC}"
-        rm -f "$MANAGER_SERVICE_FILE"
+# Remove systemd unit files
+if [ -f "$MANAGER_SERVICE_FILE" ] || [ -f "$INACTIVITY_SERVICE_FILE" ] || [ -f "$INACTIVITY_TIMER_FILE" ]; then
+        echo -e "${YELLOW}Removing systemd unit files...${NC}"
+        rm -f "$MANAGER_SERVICE_FILE" "$INACTIVITY_SERVICE_FILE" "$INACTIVITY_TIMER_FILE"
         systemctl daemon-reload 2>/dev/null || true
 fi
 
@@ -86,6 +98,12 @@ if [ -f "${NGINX_CONF_DIR}/albert-manager.conf" ]; then
         rm -f "${NGINX_CONF_DIR}/albert-manager.conf"
 fi
 
+# Remove buffered access log configuration
+if [ -f "${NGINX_CONF_DIR}/00-albert-access-log.conf" ] || [ -f "${NGINX_CONF_DIR}/albert-access-log.conf" ]; then
+        echo -e "${YELLOW}Removing nginx access log configuration...${NC}"
+        rm -f "${NGINX_CONF_DIR}/00-albert-access-log.conf" "${NGINX_CONF_DIR}/albert-access-log.conf"
+fi
+
 # Clean nginx include lines
 cleanup_nginx_include "$DEFAULT_SITE"
 cleanup_nginx_include "${NGINX_CONF_DIR}/default"